@@ -1,21 +1,52 @@
 
+import functools
 import numpy as np
 import pandas as pd
 
+rng = np.random.default_rng(42)
+
 # ------------------------------------------------------------
 # 🔥 ADVANCED NUMPY
 # ------------------------------------------------------------
 
 # Broadcasting tricks: distance matrix
-X = np.random.rand(5, 2)  # 5 points in 2D
-dist = np.sqrt(((X[:, None, :] - X[None, :, :])**2).sum(axis=2))
+# ||x-y||² = ||x||² + ||y||² - 2·x·y → one GEMM, no (N, N, D) intermediate
+# (loses precision for near-duplicate points – scipy.spatial.distance.cdist(X, X) is the exact drop-in)
+X = rng.random((5, 2))  # 5 points in 2D
+sq = (X * X).sum(axis=1)
+dist = sq[:, None] + sq[None, :] - 2 * (X @ X.T)
+np.sqrt(np.maximum(dist, 0, out=dist), out=dist)  # clip round-off negatives, in place
+np.fill_diagonal(dist, 0)  # self-distance is exactly 0, not ~1e-8 of round-off
 print("\nDistance Matrix:\n", dist)
 
+# Numba JIT: explicit loops, O(N²) memory, parallel over rows (optional dependency)
+try:
+    from numba import njit, prange
+
+    @njit("f8[:,:](f8[:,::1])", parallel=True, fastmath=True, cache=True)
+    def pairwise(X):
+        M, D = X.shape
+        out = np.zeros((M, M))
+        for i in prange(M):
+            for j in range(i + 1, M):   # symmetric → compute upper triangle only
+                d = 0.0
+                for k in range(D):
+                    tmp = X[i, k] - X[j, k]
+                    d += tmp * tmp
+                out[i, j] = out[j, i] = np.sqrt(d)
+        return out
+
+    print("\nNumba Distance Matrix:\n", pairwise(X))
+except ImportError:
+    pass
+
 # Einstein Summation (einsum) – compact tensor operations
-A = np.random.rand(3, 4)
-B = np.random.rand(4, 5)
-C = np.einsum("ik,kj->ij", A, B)  # same as A @ B
+A = rng.random((3, 4))
+B = rng.random((4, 5))
+C = np.einsum("ik,kj->ij", A, B, optimize=True)  # same as A @ B, dispatched to BLAS
 print("\nEinsum Matrix Multiply:\n", C)
+# 3+ operands: opt_einsum.contract(expr, *ops, optimize="auto-hq"), or build the
+# path once with opt_einsum.contract_expression(expr, *shapes) and reuse it
 
 # Memory views vs copy
 arr = np.arange(10)
@@ -28,19 +59,21 @@ from numpy.lib.stride_tricks import sliding_window_view
 sw = sliding_window_view(np.arange(10), window_shape=3)
 print("\nSliding Windows:\n", sw)
 
-# Masked arrays
-masked = np.ma.masked_array([1, 2, -999, 4], mask=[0, 0, 1, 0])
-print("\nMasked Mean:", masked.mean())
+# Missing values: NaN-aware reductions on a plain float array (single C pass)
+arr_nan = np.array([1, 2, np.nan, 4])
+print("\nNaN Mean:", np.nanmean(arr_nan))
+# np.ma.masked_array(...) exists when the mask must survive through algebra,
+# but every op goes through extra Python glue – several times slower.
 
 # Random advanced
-np.random.seed(42)
-print("\nMultivariate Normal:\n", np.random.multivariate_normal([0, 0], [[1, .5],[.5, 1]], 5))
+print("\nMultivariate Normal:\n", rng.multivariate_normal([0, 0], [[1, .5],[.5, 1]], 5, method="cholesky"))
 
 # ------------------------------------------------------------
 # 🔥 ADVANCED PANDAS
 # ------------------------------------------------------------
 
 # MultiIndex with slicing
+# Build an index once and reuse it across DataFrames/loops – each construction rebuilds its hash table
 arrays = [["A", "A", "B", "B"], [1, 2, 1, 2]]
 multi_idx = pd.MultiIndex.from_arrays(arrays, names=("Letter", "Number"))
 multi_df = pd.DataFrame({"Value": [10, 20, 30, 40]}, index=multi_idx)
@@ -49,18 +82,28 @@ print("\nCross-section (Letter=A):\n", multi_df.xs("A"))
 
 # Pivot with multiple aggregations
 df = pd.DataFrame({
-    "Region": ["East", "East", "West", "West"],
-    "Product": ["A", "B", "A", "B"],
+    "Region": pd.Categorical(["East", "East", "West", "West"]),   # int codes → fast groupby/pivot
+    "Product": pd.Categorical(["A", "B", "A", "B"]),
     "Sales": [100, 150, 200, 250],
     "Profit": [30, 50, 70, 90]
 })
-pivot = pd.pivot_table(df, values=["Sales", "Profit"], index="Region", aggfunc={"Sales": "sum", "Profit": "mean"})
+pivot = pd.pivot_table(df, values=["Sales", "Profit"], index="Region",
+                       aggfunc={"Sales": "sum", "Profit": "mean"}, observed=True)
 print("\nPivot with Multiple Agg:\n", pivot)
 
 # Window functions
-ts = pd.Series(np.random.randn(10), index=pd.date_range("2025-01-01", periods=10))
-print("\nRolling Mean:\n", ts.rolling(window=3).mean())
-print("\nExpanding Max:\n", ts.expanding().max())
+@functools.lru_cache(maxsize=64)
+def _daterange(start, periods, freq="D"):
+    return pd.date_range(start, periods=periods, freq=freq)  # Index is immutable → safe to share
+
+ts = pd.Series(rng.standard_normal(10), index=_daterange("2025-01-01", 10))
+# pandas: ts.rolling(window=3).mean(), ts.expanding().max()
+# NumPy on the raw values skips Rolling/Expanding dispatch overhead (sliding_window_view imported above)
+vals = ts.to_numpy()
+w = 3    # window size; the first w-1 positions have no full window → NaN
+roll = np.concatenate([np.full(w - 1, np.nan), sliding_window_view(vals, w).mean(axis=1)])
+print("\nRolling Mean:\n", pd.Series(roll, index=ts.index))
+print("\nExpanding Max:\n", pd.Series(np.maximum.accumulate(vals), index=ts.index))
 
 # Categorical optimization
 df_cat = pd.DataFrame({"Grade": ["A", "B", "A", "C", "B"]})
@@ -70,21 +113,33 @@ print("\nCategorical Codes:", df_cat["Grade"].cat.codes)
 # Method chaining with pipe
 df_chain = (df.assign(Margin=lambda x: x["Profit"]/x["Sales"])
               .query("Sales > 120")
-              .groupby("Region")
+              .groupby("Region", observed=True)
               .agg({"Margin": "mean"}))
 print("\nMethod Chaining:\n", df_chain)
+# Large numeric groupbys (≳1e4 rows): JIT the aggregation with numba. The first call pays
+# the compile cost, so warm it up once before timing/looping.
+# (df.assign(Margin=lambda x: x["Profit"]/x["Sales"])
+#    .groupby("Region", observed=True)["Margin"]
+#    .mean(engine="numba", engine_kwargs={"parallel": True, "nogil": True}))
 
 # Query API with local variables
 threshold = 180
 print("\nQuery with local var:\n", df.query("Sales > @threshold"))
 
-# Apply custom function row-wise
-df["Perf"] = df.apply(lambda row: "High" if row["Profit"] > 60 else "Low", axis=1)
-print("\nCustom Apply:\n", df)
-
-# Efficient string methods
-df_str = pd.Series(["  Hello ", "WORLD!!", "pandas_rocks"])
-print("\nString Ops:\n", df_str.str.strip().str.lower().str.replace("!", "").str.contains("world"))
+# Vectorized condition instead of row-wise apply
+# slow: df.apply(lambda row: "High" if row["Profit"] > 60 else "Low", axis=1)
+profit = df["Profit"].to_numpy()
+df["Perf"] = pd.Categorical.from_codes((profit > 60).astype(np.int8), categories=["Low", "High"])
+print("\nVectorized Condition:\n", df)
+
+# Efficient string methods – Arrow-backed strings run each .str op as a C++ kernel
+try:
+    import pyarrow  # noqa: F401
+    str_dtype = "string[pyarrow]"
+except ImportError:
+    str_dtype = "string"
+df_str = pd.Series(["  Hello ", "WORLD!!", "pandas_rocks"], dtype=str_dtype)
+print("\nString Ops:\n", df_str.str.strip().str.lower().str.replace("!", "", regex=False).str.contains("world", regex=False))
 
 # Style formatting (Jupyter only)
 # df.style.highlight_max(color="lightgreen").hide_index()
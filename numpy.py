@@ -2,6 +2,8 @@
 
 import numpy as np
 
+rng = np.random.default_rng(42)          # modern Generator (PCG64), faster than legacy np.random.*
+
 # ------------------------------------------------------------
 # 1. Creating Arrays
 # ------------------------------------------------------------
@@ -13,7 +15,7 @@ print("Array b:\n", b)
 zeros = np.zeros((2, 3))                 # 2x3 zeros
 ones = np.ones((2, 3))                   # 2x3 ones
 eye = np.eye(3)                          # identity matrix
-rand = np.random.rand(2, 3)              # random floats
+rand = rng.random((2, 3))                # random floats
 arange = np.arange(0, 10, 2)             # 0 to 10 step 2
 lin = np.linspace(0, 1, 5)               # 5 points between 0 and 1
 
@@ -105,18 +107,23 @@ print(arr[[1, 3, 5]] * 2)       # multiply selection
 M = np.array([[1, 2], [3, 4]])
 N = np.array([[5, 6], [7, 8]])
 print(np.dot(M, N))             # matrix multiplication
-print(np.linalg.inv(M))         # inverse
+print(np.linalg.inv(M))         # inverse (prefer solve below for M⁻¹·b)
 print(np.linalg.det(M))         # determinant
 print(np.linalg.eig(M))         # eigenvalues/vectors
 
+v = np.array([1, 2])
+print(np.linalg.solve(M, v))    # solves M·x = v; cheaper & more accurate than inv(M) @ v
+S = M + M.T                     # symmetric matrix
+print(np.linalg.eigh(S))        # symmetric/Hermitian eig → faster LAPACK routine
+
 # ------------------------------------------------------------
 # 12. Random Module
 # ------------------------------------------------------------
-print(np.random.rand(3))          # uniform [0,1)
-print(np.random.randn(3))         # normal distribution
-print(np.random.randint(1, 10, 5))# random ints
-np.random.seed(42)                # reproducibility
-print(np.random.rand(3))
+print(rng.random(3))              # uniform [0,1)
+print(rng.standard_normal(3))     # normal distribution
+print(rng.integers(1, 10, 5))     # random ints
+rng = np.random.default_rng(42)   # reproducibility: same seed → same stream
+print(rng.random(3))
 
 # ------------------------------------------------------------
 # 13. Advanced Indexing (Masks & Conditions)
@@ -129,9 +136,8 @@ print(np.where(A > 5, "big", "small"))
 # ------------------------------------------------------------
 # 14. Advanced: Broadcasting in Practice
 # ------------------------------------------------------------
-X = np.arange(1, 4).reshape(3, 1)
-Y = np.arange(1, 4)
-print("Broadcasted Sum:\n", X + Y)
+Z = np.add.outer(np.arange(1, 4), np.arange(1, 4))  # same as col(3x1) + row(1x3)
+print("Outer Sum:\n", Z)
 
 # ------------------------------------------------------------
 # 15. Advanced: Structured Arrays
@@ -171,9 +177,13 @@ np.save("array.npy", arr1)
 loaded = np.load("array.npy")
 print("Loaded:", loaded)
 
-# Save/load text
-np.savetxt("array.txt", arr1)
-print("From txt:", np.loadtxt("array.txt"))
+# Several arrays in one file (savez_compressed for smaller files)
+np.savez("array.npz", arr=arr1, sq=arr1**2)
+with np.load("array.npz") as data:   # NpzFile holds the file open → close it
+    print("From npz:", data["arr"], data["sq"])
+
+# Text (np.savetxt / np.loadtxt) is human-readable but formats/parses every value
+# in Python – orders of magnitude slower; use .npy/.npz for real workloads
 
 # ------------------------------------------------------------
 # 20. Advanced: Meshgrid & Vectorized Computations
@@ -181,7 +191,16 @@ print("From txt:", np.loadtxt("array.txt"))
 x = np.linspace(-2, 2, 5)
 y = np.linspace(-2, 2, 5)
 X, Y = np.meshgrid(x, y)
-Z = np.sqrt(X**2 + Y**2)
+Z = np.hypot(X, Y)              # fused sqrt(X**2 + Y**2), no temporaries
 print("\nMeshgrid Z:\n", Z)
 
+# Same idea for other formulas: reuse buffers via out= instead of allocating temporaries
+Z2 = np.empty_like(X)           # preallocated result
+tmp = np.empty_like(Y)          # preallocated scratch
+np.multiply(X, X, out=Z2)
+np.multiply(Y, Y, out=tmp)
+np.add(Z2, tmp, out=Z2)
+np.sqrt(Z2, out=Z2)
+print("out= buffers match hypot:", np.allclose(Z2, Z))
+
 
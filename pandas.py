@@ -6,6 +6,8 @@
 import pandas as pd
 import numpy as np
 
+rng = np.random.default_rng(42)   # modern NumPy random Generator
+
 # ------------------------------------------------------------
 # 1. Creating Series and DataFrame
 # ------------------------------------------------------------
@@ -123,8 +125,9 @@ print("\nCrosstab:\n", cross)
 # ------------------------------------------------------------
 # 13. Applying Functions
 # ------------------------------------------------------------
-df["Salary_Lakh"] = df["Salary"].apply(lambda x: x/100000)
+df["Salary_Lakh"] = df["Salary"] / 100000   # vectorized; prefer over .apply(lambda x: x/100000)
 print("\nApply:\n", df)
+# Use .apply only when no vectorized equivalent exists (it calls Python once per element)
 
 # ------------------------------------------------------------
 # 14. Advanced Indexing (MultiIndex)
@@ -138,7 +141,7 @@ print("\nMultiIndex DF:\n", multi_df)
 # 15. Time Series
 # ------------------------------------------------------------
 dates = pd.date_range("2025-01-01", periods=5, freq="D")
-ts = pd.Series(np.random.randn(5), index=dates)
+ts = pd.Series(rng.standard_normal(5), index=dates)
 print("\nTime Series:\n", ts)
 print(ts.resample("2D").mean())
 
@@ -1,7 +1,9 @@
 # --- 0) Install dependencies ---
 !pip install google-generativeai --quiet
 
-import os, json, subprocess, re
+import os, json, subprocess, re, threading, functools, hashlib, shelve
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 
 # ---------- 1) Install node + node-sql-parser ----------
@@ -18,48 +20,146 @@ subprocess.run(["npm", "init", "-y"], check=True, stdout=subprocess.DEVNULL)
 subprocess.run(["npm", "install", "node-sql-parser@latest"], check=True, stdout=subprocess.DEVNULL)
 
 # ---------- 2) Node helper ----------
+# Long-lived parser: one JSON-encoded SQL string (or array of strings) per stdin line
+# → one JSON AST (or array of ASTs) per stdout line
 node_helper = """
 const { Parser } = require('node-sql-parser');
+const readline = require('readline');
 const parser = new Parser();
-const sql = process.argv.slice(2).join(" ");
-try {
-  const ast = parser.astify(sql);
-  console.log(JSON.stringify(ast, null, 2));
-} catch (err) {
-  console.error(JSON.stringify({error: err.message}));
-  process.exit(2);
-}
+const astify = sql => {
+  try {
+    return parser.astify(sql);
+  } catch (err) {
+    return {error: err.message};
+  }
+};
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', line => {
+  let out;
+  try {
+    const req = JSON.parse(line);
+    out = Array.isArray(req) ? req.map(astify) : astify(req);
+  } catch (err) {
+    out = {error: err.message};
+  }
+  process.stdout.write(JSON.stringify(out) + "\\n");
+});
 """
 with open("node_parse.js", "w") as f:
     f.write(node_helper)
 
-def parse_with_node(sql: str):
-    """Call node-sql-parser and return AST as dict"""
-    cmd = ["node", "node_parse.js", sql]
-    try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return json.loads(proc.stdout)
-    except subprocess.CalledProcessError as e:
+class NodeParser:
+    """Keep one node process alive and stream SQL through it (avoids V8 startup per query)"""
+    def __init__(self, script="node_parse.js"):
+        self.proc = subprocess.Popen(["node", script], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, text=True)
+        self.lock = threading.Lock()  # one request/response pair on the pipe at a time
+
+    def parse(self, sql: str):
+        return self._request(sql)
+
+    def parse_many(self, sqls):
+        """Parse several SQLs in a single request/response round trip"""
+        return self._request(list(sqls))
+
+    def _request(self, payload):
+        with self.lock:
+            self.proc.stdin.write(json.dumps(payload) + "\n")
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError("node parser exited")  # raise, don't cache a transient failure
+        return json.loads(line)
+
+    def close(self):
         try:
-            return json.loads(e.stderr)
-        except Exception:
-            return {"error": e.stderr.strip()}
+            self.proc.stdin.close()  # EOF → readline closes → node exits
+        except OSError:
+            pass  # node already gone (broken pipe)
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+_node_parser = None
+_node_lock = threading.Lock()
+
+def get_node_parser():
+    """Start node on the first cache miss, so fully cached reruns never launch it"""
+    global _node_parser
+    with _node_lock:
+        if _node_parser is None:
+            _node_parser = NodeParser()
+        return _node_parser
+
+# ---------- Cache: in-memory (lru_cache) + on-disk (shelve) so reruns skip Node/Gemini ----------
+# Values are stored as JSON text, so each caller gets a fresh dict. Delete ast_cache* to reset.
+_disk_cache = shelve.open("ast_cache")
+_disk_lock = threading.Lock()  # shelve is not thread-safe
+
+# Close the shelf and node even if the run is interrupted or raises (e.g. Ctrl-C in the
+# Gemini pool): otherwise entries may be lost and a rerun in the same kernel can fail
+# to reopen the locked shelf.
+try:
+    # npm installs @latest each run: key cached ASTs on the installed parser version so an
+    # upgrade invalidates both the gold ASTs and the Gemini answers (prompt embeds parser output)
+    with open("node_modules/node-sql-parser/package.json") as f:
+        PARSER_VERSION = json.load(f)["version"]
+
+    def cached_by_sql(namespace: str, batch_fn=None):
+        def decorator(fn):
+            def key(sql: str) -> str:
+                return namespace + ":" + sql
+
+            @functools.lru_cache(maxsize=4096)
+            def as_text(sql: str) -> str:
+                with _disk_lock:
+                    if key(sql) in _disk_cache:
+                        return _disk_cache[key(sql)]
+                text = json.dumps(fn(sql))  # exceptions propagate and are not cached
+                with _disk_lock:
+                    _disk_cache[key(sql)] = text
+                return text
+
+            def many(sqls):
+                """Look every SQL up in the cache and send only the misses through batch_fn at once"""
+                with _disk_lock:
+                    texts = {sql: _disk_cache[key(sql)] for sql in sqls if key(sql) in _disk_cache}
+                misses = [sql for sql in dict.fromkeys(sqls) if sql not in texts]
+                if misses:
+                    fresh = batch_fn(misses) if batch_fn else [fn(sql) for sql in misses]
+                    with _disk_lock:
+                        for sql, value in zip(misses, fresh):
+                            texts[sql] = _disk_cache[key(sql)] = json.dumps(value)
+                return [json.loads(texts[sql]) for sql in sqls]
+
+            @functools.wraps(fn)
+            def wrapper(sql: str):
+                return json.loads(as_text(sql))
+            wrapper.many = many
+            return wrapper
+        return decorator
+
+    @cached_by_sql("node:" + PARSER_VERSION, batch_fn=lambda sqls: get_node_parser().parse_many(sqls))
+    def parse_with_node(sql: str):
+        """Call node-sql-parser and return AST as dict"""
+        return get_node_parser().parse(sql)
 
-# ---------- 3) Few-shot examples ----------
-examples = [
-    "SELECT id, name FROM users WHERE age > 30 ORDER BY id DESC;",
-    "SELECT COUNT(*) as cnt FROM orders WHERE status = 'shipped';",
-    "INSERT INTO accounts (id, balance) VALUES (1, 1000);"
-]
+    # ---------- 3) Few-shot examples ----------
+    examples = [
+        "SELECT id, name FROM users WHERE age > 30 ORDER BY id DESC;",
+        "SELECT COUNT(*) as cnt FROM orders WHERE status = 'shipped';",
+        "INSERT INTO accounts (id, balance) VALUES (1, 1000);"
+    ]
 
-dataset = [{"sql": sql, "ast": parse_with_node(sql)} for sql in examples]
+    dataset = [{"sql": sql, "ast": ast} for sql, ast in zip(examples, parse_with_node.many(examples))]
 
-examples_text = ""
-for ex in dataset[:2]:
-    examples_text += f"SQL:\n{ex['sql']}\n\nAST (node-sql-parser JSON):\n"
-    examples_text += json.dumps(ex["ast"], separators=(',', ':'), ensure_ascii=False) + "\n\n---\n\n"
+    examples_text = ""
+    for ex in dataset[:2]:
+        examples_text += f"SQL:\n{ex['sql']}\n\nAST (node-sql-parser JSON):\n"
+        examples_text += json.dumps(ex["ast"], separators=(',', ':'), ensure_ascii=False) + "\n\n---\n\n"
 
-system_msg = """You are a JSON-only generator. 
+    system_msg = """You are a JSON-only generator. 
 Given an SQL query, produce a JSON AST that matches the `node-sql-parser` npm package.
 Rules:
 1) Output must be valid JSON only.
@@ -67,91 +167,104 @@ Rules:
 3) If you cannot parse, return {"error": "..."}.
 """
 
-# ---------- 4) Configure Gemini ----------
-GEMINI_API_KEY = os.environ.get("GOOGLE_API_KEY", None) or "YOUR_GEMINI_API_KEY"
-if GEMINI_API_KEY == "YOUR_GEMINI_API_KEY":
-    print("⚠️ Set your Gemini API key: os.environ['GOOGLE_API_KEY'] = '...' ")
-
-genai.configure(api_key=GEMINI_API_KEY)
-gemini_model = genai.GenerativeModel("gemini-1.5-pro")
-
-def call_llm_to_generate_ast_gemini(sql_query: str):
-    prompt = f"{system_msg}\n\n{examples_text}\nSQL:\n{sql_query}\n\nAST (node-sql-parser JSON):\n"
-    resp = gemini_model.generate_content(prompt)
-    content = resp.text.strip()
-    # Remove accidental markdown fences
-    content = re.sub(r"^```(?:json)?\s*", "", content)
-    content = re.sub(r"\s*```$", "", content)
-    return json.loads(content)
-
-# ---------- 5) Accuracy Scoring ----------
-def compare_json(gold, pred):
-    """Recursively compare JSON and count matches/total keys"""
-    matches, total = 0, 0
-    if isinstance(gold, dict) and isinstance(pred, dict):
-        for k in gold:
-            total += 1
-            if k in pred:
-                sub_m, sub_t = compare_json(gold[k], pred[k])
-                matches += sub_m
-                total += sub_t
-        return matches, total
-    elif isinstance(gold, list) and isinstance(pred, list):
-        for g, p in zip(gold, pred):
-            sub_m, sub_t = compare_json(g, p)
-            matches += sub_m
-            total += sub_t
-        total += abs(len(gold) - len(pred))  # count unmatched
+    # ---------- 4) Configure Gemini ----------
+    GEMINI_API_KEY = os.environ.get("GOOGLE_API_KEY", None) or "YOUR_GEMINI_API_KEY"
+    if GEMINI_API_KEY == "YOUR_GEMINI_API_KEY":
+        print("⚠️ Set your Gemini API key: os.environ['GOOGLE_API_KEY'] = '...' ")
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    gemini_model = genai.GenerativeModel("gemini-1.5-pro")
+
+    # Markdown fences the model sometimes wraps around its JSON
+    _FENCE_OPEN = re.compile(r"^```(?:json)?\s*")
+    _FENCE_CLOSE = re.compile(r"\s*```$")
+
+    # Key LLM results on the model + prompt header too, so editing the prompt invalidates them
+    _prompt_key = hashlib.sha1(f"{gemini_model.model_name}\n{PARSER_VERSION}\n{system_msg}\n{examples_text}".encode()).hexdigest()
+
+    @cached_by_sql("gemini:" + _prompt_key)
+    def call_llm_to_generate_ast_gemini(sql_query: str):
+        prompt = f"{system_msg}\n\n{examples_text}\nSQL:\n{sql_query}\n\nAST (node-sql-parser JSON):\n"
+        resp = gemini_model.generate_content(prompt)
+        content = resp.text.strip()
+        # Remove accidental markdown fences
+        if content.startswith("```"):
+            content = _FENCE_OPEN.sub("", content, count=1)
+        if content.endswith("```"):
+            content = _FENCE_CLOSE.sub("", content, count=1)
+        return json.loads(content)
+
+    # ---------- 5) Accuracy Scoring ----------
+    def compare_json(gold, pred):
+        """Compare JSON with an explicit stack (no recursion) and count matches/total keys"""
+        matches, total = 0, 0
+        stack = deque([(gold, pred)])
+        while stack:
+            g, p = stack.pop()
+            if isinstance(g, dict) and isinstance(p, dict):
+                for k, gv in g.items():
+                    total += 1
+                    if k in p:
+                        stack.append((gv, p[k]))
+            elif isinstance(g, list) and isinstance(p, list):
+                stack.extend(zip(g, p))
+                total += abs(len(g) - len(p))  # count unmatched
+            else:
+                total += 1
+                if g == p:
+                    matches += 1
         return matches, total
-    else:
-        total += 1
+
+    def score_accuracy(gold, pred):
         if gold == pred:
-            matches += 1
-        return matches, total
+            return {"exact_match": 1, "match_percent": 100.0}
+        matches, total = compare_json(gold, pred)
+        return {
+            "exact_match": 0,
+            "match_percent": round((matches/total)*100, 2) if total > 0 else 0.0,
+            "matches": matches,
+            "total": total
+        }
+
+    # ---------- 6) Batch Testing ----------
+    test_sqls = [
+        "UPDATE products SET price = price * 1.1 WHERE category = 'books';",
+        "DELETE FROM logs WHERE created_at < '2024-01-01';",
+        "SELECT u.id, COUNT(o.id) FROM users u JOIN orders o ON u.id = o.user_id GROUP BY u.id;",
+        "CREATE TABLE employees (id INT PRIMARY KEY, name VARCHAR(100), salary DECIMAL);",
+        "INSERT INTO students (id, name, grade) VALUES (1, 'Alice', 'A');",
+        "ALTER TABLE accounts ADD COLUMN last_login TIMESTAMP;",
+        "DROP TABLE temp_data;",
+        "SELECT * FROM customers WHERE city IN ('Paris', 'London');",
+        "SELECT name, SUM(amount) FROM sales GROUP BY name HAVING SUM(amount) > 5000;",
+        "SELECT DISTINCT country FROM customers;"
+    ]
+
+    def eval_one(sql: str):
+        gold_ast = parse_with_node(sql)
+        try:
+            llm_ast = call_llm_to_generate_ast_gemini(sql)
+            score = score_accuracy(gold_ast, llm_ast)
+        except Exception as e:
+            score = {"error": str(e), "exact_match": 0, "match_percent": 0.0}
+        return {"sql": sql, "score": score}
+
+    # Gemini calls are network-bound, so threads overlap the round-trips (map keeps input order)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(eval_one, test_sqls))
+
+    # Report
+    print("\n--- Batch Accuracy Report ---")
+    total_exact = sum(r["score"].get("exact_match", 0) for r in results)
+    avg_match = sum(r["score"].get("match_percent", 0) for r in results) / len(results)
+    print(f"Exact Matches: {total_exact}/{len(results)}")
+    print(f"Average Structural Match: {avg_match:.2f}%\n")
 
-def score_accuracy(gold, pred):
-    if gold == pred:
-        return {"exact_match": 1, "match_percent": 100.0}
-    matches, total = compare_json(gold, pred)
-    return {
-        "exact_match": 0,
-        "match_percent": round((matches/total)*100, 2) if total > 0 else 0.0,
-        "matches": matches,
-        "total": total
-    }
-
-# ---------- 6) Batch Testing ----------
-test_sqls = [
-    "UPDATE products SET price = price * 1.1 WHERE category = 'books';",
-    "DELETE FROM logs WHERE created_at < '2024-01-01';",
-    "SELECT u.id, COUNT(o.id) FROM users u JOIN orders o ON u.id = o.user_id GROUP BY u.id;",
-    "CREATE TABLE employees (id INT PRIMARY KEY, name VARCHAR(100), salary DECIMAL);",
-    "INSERT INTO students (id, name, grade) VALUES (1, 'Alice', 'A');",
-    "ALTER TABLE accounts ADD COLUMN last_login TIMESTAMP;",
-    "DROP TABLE temp_data;",
-    "SELECT * FROM customers WHERE city IN ('Paris', 'London');",
-    "SELECT name, SUM(amount) FROM sales GROUP BY name HAVING SUM(amount) > 5000;",
-    "SELECT DISTINCT country FROM customers;"
-]
-
-results = []
-for sql in test_sqls:
-    gold_ast = parse_with_node(sql)
-    try:
-        llm_ast = call_llm_to_generate_ast_gemini(sql)
-        score = score_accuracy(gold_ast, llm_ast)
-    except Exception as e:
-        score = {"error": str(e), "exact_match": 0, "match_percent": 0.0}
-    results.append({"sql": sql, "score": score})
-
-# Report
-print("\n--- Batch Accuracy Report ---")
-total_exact = sum(r["score"].get("exact_match", 0) for r in results)
-avg_match = sum(r["score"].get("match_percent", 0) for r in results) / len(results)
-print(f"Exact Matches: {total_exact}/{len(results)}")
-print(f"Average Structural Match: {avg_match:.2f}%\n")
-
-for r in results:
-    print(f"SQL: {r['sql']}")
-    print("Score:", r["score"])
-    print("---")
+    for r in results:
+        print(f"SQL: {r['sql']}")
+        print("Score:", r["score"])
+        print("---")
+finally:
+    if _node_parser is not None:
+        _node_parser.close()
+    _disk_cache.close()